@@ -1,35 +1,202 @@
 from __future__ import annotations
+
+import atexit
+import itertools
 import os
-import mss
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def take_screenshot() -> str:
+import mss
+from PIL import Image
+
+# On Windows, prefer DXGI Desktop Duplication (dxcam) over mss' GDI BitBlt path when installed
+_dxcam = None
+if sys.platform == "win32":
+    try:
+        import dxcam as _dxcam
+        import numpy as np
+    except ImportError:
+        _dxcam = None
+
+# JPEG is much smaller and cheaper to encode than PNG, which is all a vision
+# model needs. Set INTERPRETER_SCREENSHOT_PNG=1 to keep lossless PNGs for debugging.
+_png_flag = os.environ.get("INTERPRETER_SCREENSHOT_PNG", "")
+_SAVE_PNG = _png_flag.lower() in ("1", "true", "yes")
+_JPEG_QUALITY = 85
+
+# Longest side (px) screenshots are downscaled to for the vision model
+DEFAULT_MAX_SIDE = 1536
+
+# The 'screenshots' directory is created on the first capture, not at import
+_screenshots_dir_ensured = False
+
+# Filenames are "<process start time>_<pid>_<counter>": unique within the process without
+# formatting the clock per capture, and across runs even if a pid gets reused.
+_RUN_ID = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+_counter = itertools.count()  # next() is atomic under the GIL
+
+# (path, time.monotonic() of the capture, max_side) of the most recent screenshot
+_last_shot = None
+
+# mss handles (GDI DCs / X11 display connections) are bound to the thread that
+# created them, so each thread lazily opens and then reuses its own instance.
+_sct_local = threading.local()
+_sct_instances = []
+_sct_lock = threading.Lock()
+
+# Background captures (e.g. before code messages) share this one worker thread,
+# and so one mss handle, across every interpreter in the process
+screenshot_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="oi-screenshot")
+
+
+def _get_sct():
+    """
+    Return this thread's persistent `mss.mss()` instance and its primary monitor.
+
+    The OS capture handles are created on first use and kept open for the
+    lifetime of the process, so repeated captures only pay for the grab itself.
+    """
+    sct = getattr(_sct_local, "sct", None)
+    if sct is None:
+        sct = mss.mss()
+        _sct_local.sct = sct
+        # Select the primary monitor (index 1 in mss)
+        _sct_local.monitor = sct.monitors[1]
+        with _sct_lock:
+            _sct_instances.append(sct)
+    return sct, _sct_local.monitor
+
+
+_cam = None
+# Last frame dxcam returned; it yields None while the screen is unchanged
+_cam_frame = None
+_cam_lock = threading.Lock()
+
+
+def _grab_dxcam():
+    """
+    Grab the primary output with dxcam.
+
+    Returns:
+        tuple | None: `(size, bgra_buffer)`, or None when dxcam isn't available
+        and the caller should fall back to mss.
+    """
+    global _dxcam, _cam, _cam_frame
+    if _dxcam is None:
+        return None
+    with _cam_lock:
+        if _cam is None:
+            try:
+                _cam = _dxcam.create(output_idx=0, output_color="BGRA")
+            except Exception:
+                # e.g. no DXGI output in RDP sessions; don't try again
+                _dxcam = None
+                return None
+        try:
+            frame = _cam.grab()
+        except Exception:
+            return None
+        if frame is not None:
+            # dxcam returns a strided view when the row pitch isn't the width
+            # (e.g. 1366/1440/1680 wide, or rotated displays); Pillow needs C order
+            _cam_frame = np.ascontiguousarray(frame)
+        elif _cam_frame is None:
+            return None
+        frame = _cam_frame
+    height, width = frame.shape[:2]
+    return (width, height), frame
+
+
+@atexit.register
+def _close_scts():
+    """Release every capture handle opened by `_get_sct` / `_grab_dxcam` at interpreter exit."""
+    with _sct_lock:
+        while _sct_instances:
+            try:
+                _sct_instances.pop().close()
+            except Exception:
+                pass
+    if _cam is not None:
+        try:
+            _cam.release()
+        except Exception:
+            pass
+
+
+def _save(img, path, *args, **kwargs):
+    """Save `img` to `path`, recreating the 'screenshots' directory if it was removed."""
+    try:
+        img.save(path, *args, **kwargs)
+    except FileNotFoundError:
+        # e.g. deleted by cleanup code since the first capture created it
+        os.makedirs("screenshots", exist_ok=True)
+        img.save(path, *args, **kwargs)
+
+
+def take_screenshot(
+    max_side: int | None = DEFAULT_MAX_SIDE, reuse_within: float = 0
+) -> str:
     """
     Captures a screenshot of the primary monitor and saves it to the 'screenshots' directory.
 
-    This function uses the `mss` library to capture the screen and saves the screenshot as a PNG file
-    in the 'screenshots' directory. The file is named with a timestamp to ensure uniqueness.
+    This function uses the `mss` library to capture the screen and saves the screenshot as a JPEG
+    file (or PNG when `INTERPRETER_SCREENSHOT_PNG` is set) in the 'screenshots' directory. The file
+    is named with a per-process counter to ensure uniqueness. The underlying `mss` instance is
+    reused across calls (one per thread). On Windows, `dxcam` is used instead when it's installed.
+
+    Args:
+        max_side (int | None): Downscale the JPEG so neither side exceeds this many pixels,
+            keeping the aspect ratio. Pass None to keep the full monitor resolution.
+        reuse_within (float): If a screenshot with the same `max_side` was taken less than this
+            many seconds ago, return its path instead of capturing again. 0 always captures.
 
     Returns:
         str: The file path of the saved screenshot.
     """
-    # Ensure the 'screenshots' directory exists; create it if it doesn't
-    if not os.path.exists("screenshots"):
-        os.makedirs("screenshots")
+    global _last_shot, _screenshots_dir_ensured
+    if reuse_within > 0 and _last_shot is not None:
+        last_path, last_ts, last_max_side = _last_shot
+        if last_max_side == max_side and time.monotonic() - last_ts < reuse_within:
+            return last_path
 
-    # Create a screen capture object using mss
-    with mss.mss() as sct:
-        # Select the primary monitor (index 1 in mss)
-        monitor = sct.monitors[1]
-        # Capture the screen contents of the primary monitor
+    # Ensure the 'screenshots' directory exists, once per process
+    if not _screenshots_dir_ensured:
+        os.makedirs("screenshots", exist_ok=True)
+        _screenshots_dir_ensured = True
+
+    # Generate a unique filename for the screenshot
+    name = f"screenshot_{_RUN_ID}_{next(_counter):06d}"
+
+    # Capture the screen contents of the primary monitor
+    captured_at = time.monotonic()
+    grabbed = _grab_dxcam()
+    if grabbed is None:
+        sct, monitor = _get_sct()
         screenshot = sct.grab(monitor)
+        grabbed = (screenshot.size, screenshot.bgra)
+    size, bgra = grabbed
+
+    # Read the raw BGRA buffer directly (Pillow drops the padding byte in C),
+    # avoiding the per-pixel BGRA->RGB reshuffle done by `screenshot.rgb`
+    img = Image.frombuffer("RGB", size, bgra, "raw", "BGRX", 0, 1)
+
+    if _SAVE_PNG:
+        # Full-resolution, lossless output for debugging
+        path = os.path.join("screenshots", f"{name}.png")
+        _save(img, path, "PNG")
+        _last_shot = (path, captured_at, max_side)
+        return path
 
-        # Generate a timestamped filename for the screenshot
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        path = os.path.join("screenshots", f"screenshot_{ts}.png")
+    path = os.path.join("screenshots", f"{name}.jpeg")
 
-        # Save the screenshot as a PNG file
-        mss.tools.to_png(screenshot.rgb, screenshot.size, output=path)
+    # Shrink to the vision model's working resolution to cut upload size and prefill tokens
+    if max_side:
+        img.thumbnail((max_side, max_side), Image.BILINEAR)
+    _save(img, path, "JPEG", quality=_JPEG_QUALITY, optimize=False)
+    _last_shot = (path, captured_at, max_side)
 
-        # Return the file path of the saved screenshot
-        return path
\ No newline at end of file
+    # Return the file path of the saved screenshot
+    return path
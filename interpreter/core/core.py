@@ -2,12 +2,14 @@
 This file defines the Interpreter class.
 It's the main file. `from interpreter import interpreter` will import an instance of this class.
 """
-import json
+import collections
 import os
 import threading
-import time
 from datetime import datetime
 
+import orjson
+
+from ..capture import screenshot_pool, take_screenshot
 from ..terminal_interface.local_setup import local_setup
 from ..terminal_interface.terminal_interface import terminal_interface
 from ..terminal_interface.utils.display_markdown_message import display_markdown_message
@@ -17,9 +19,18 @@ from .computer.computer import Computer
 from .default_system_message import default_system_message
 from .llm.llm import Llm
 from .respond import respond
+from .utils.conversation_writer import queue_save
 from .utils.telemetry import send_telemetry
 from .utils.truncate_output import truncate_output
-from ..capture import take_screenshot
+
+# Strips characters that are invalid in filenames, in a single pass
+_FN_TRANSLATE = str.maketrans("", "", '<>:"/\\|?*!\n')
+
+
+def _dumps_messages(messages):
+    """Serialize messages to UTF-8 JSON bytes."""
+    # OPT_NON_STR_KEYS matches the stdlib's handling of e.g. int keys
+    return orjson.dumps(messages, option=orjson.OPT_NON_STR_KEYS)
 
 
 class OpenInterpreter:
@@ -84,8 +95,13 @@ class OpenInterpreter:
     ):
         # State
         self.messages = [] if messages is None else messages
+        self._done = threading.Event()  # Set whenever we're not responding
         self.responding = False
         self.last_messages_count = 0
+        # (future, image message) for a screenshot still being captured in the background
+        self._pending_screenshot = None
+        # The message whose streamed text is still held in its `_chunks` buffer
+        self._buffered_message = None
 
         # Settings
         self.offline = offline
@@ -111,6 +127,8 @@ class OpenInterpreter:
         self.conversation_history = conversation_history
         self.conversation_filename = conversation_filename
         self.conversation_history_path = conversation_history_path
+        self._hist_dir_ensured = None  # Path we've already created, if any
+        self._last_saved = None  # (path, messages list id, length) of the last write
 
         # OS control mode related attributes
         self.os = os
@@ -151,18 +169,35 @@ class OpenInterpreter:
         messages that were added during the current response cycle.
 
         This is a convenience for callers that want to synchronously wait for
-        the interpreter to complete handling a message. The method polls the
-        `self.responding` flag and returns the slice of `self.messages`
-        produced since the last call (using `self.last_messages_count`).
+        the interpreter to complete handling a message. The method blocks on
+        the `self._done` event (set whenever `self.responding` is False) and
+        returns the slice of `self.messages` produced since the last call
+        (using `self.last_messages_count`).
 
         Returns:
             list: A list of messages appended during the last response.
         """
-        while self.responding:
-            time.sleep(0.2)
+        self._done.wait()
         # Return new messages (messages appended since last_messages_count)
         return self.messages[self.last_messages_count :]
 
+    @property
+    def responding(self) -> bool:
+        """
+        Whether a response is in progress.
+
+        Backed by the `self._done` event, so setting it to False (e.g. after
+        draining a `stream=True` generator) also releases `wait()`.
+        """
+        return not self._done.is_set()
+
+    @responding.setter
+    def responding(self, value):
+        if value:
+            self._done.clear()
+        else:
+            self._done.set()
+
     @property
     def anonymous_telemetry(self) -> bool:
         """
@@ -215,6 +250,11 @@ class OpenInterpreter:
             list|generator|None: Depending on the mode, returns the new
             messages list, a streaming generator, or None for background
             invocations.
+
+        With `conversation_history` on, the conversation file is written by a
+        background thread, so it may not be on disk yet when `chat()` returns.
+        Call `interpreter.core.utils.conversation_writer.flush_saves()` to wait
+        for it.
         """
         try:
             self.responding = True
@@ -242,8 +282,10 @@ class OpenInterpreter:
                 return self._streaming_chat(message=message, display=display)
 
             # If stream=False, *pull* from the stream.
-            for _ in self._streaming_chat(message=message, display=display):
-                pass
+            if display:
+                self._blocking_display_chat(message=message)
+            else:
+                self._run_non_streaming(message=message)
 
             # Return new messages
             self.responding = False
@@ -283,76 +325,105 @@ class OpenInterpreter:
             yield from terminal_interface(self, message)
             return
 
-        # One-off message
-        if message or message == "":
-            ## We support multiple formats for the incoming message:
-            # Dict (these are passed directly in)
-            if isinstance(message, dict):
-                if "role" not in message:
-                    message["role"] = "user"
-                self.messages.append(message)
-            # String (we construct a user message dict)
-            elif isinstance(message, str):
-                self.messages.append(
-                    {"role": "user", "type": "message", "content": message}
-                )
-            # List (this is like the OpenAI API)
-            elif isinstance(message, list):
-                self.messages = message
-
-            # Now that the user's messages have been added, we set last_messages_count.
-            # This way we will only return the messages after what they added.
-            self.last_messages_count = len(self.messages)
-
-            # DISABLED because I think we should just not transmit images to non-multimodal models?
-            # REENABLE this when multimodal becomes more common:
-
-            # Make sure we're using a model that can handle this
-            # if not self.llm.supports_vision:
-            #     for message in self.messages:
-            #         if message["type"] == "image":
-            #             raise Exception(
-            #                 "Use a multimodal model and set `interpreter.llm.supports_vision` to True to handle image messages."
-            #             )
-
-            # This is where it all happens!
-            yield from self._respond_and_store()
-
-            # Save conversation if we've turned conversation_history on
-            if self.conversation_history:
-                # If it's the first message, set the conversation name
-                if not self.conversation_filename:
-                    first_few_words_list = self.messages[0]["content"][:25].split(" ")
-                    if (
-                        len(first_few_words_list) >= 2
-                    ):  # for languages like English with blank between words
-                        first_few_words = "_".join(first_few_words_list[:-1])
-                    else:  # for languages like Chinese without blank between words
-                        first_few_words = self.messages[0]["content"][:15]
-                    for char in '<>:"/\\|?*!\n':  # Invalid characters for filenames
-                        first_few_words = first_few_words.replace(char, "")
-
-                    date = datetime.now().strftime("%B_%d_%Y_%H-%M-%S")
-                    self.conversation_filename = (
-                        "__".join([first_few_words, date]) + ".json"
-                    )
+        self._add_incoming_message(message)
+
+        # This is where it all happens!
+        yield from self._respond_and_store()
+
+        self._save_conversation()
+
+    def _run_non_streaming(self, message=None):
+        """
+        The `display=False, stream=False` path of `chat()`.
+
+        Same steps as `_streaming_chat(display=False)`, but drains
+        `_respond_and_store()` directly in C instead of re-yielding every
+        chunk through another generator only to discard it.
+        """
+        self._add_incoming_message(message)
+        collections.deque(self._respond_and_store(), maxlen=0)
+        self._save_conversation()
+
+    def _blocking_display_chat(self, message=None):
+        """
+        The `display=True, stream=False` path of `chat()`.
 
-                # Check if the directory exists, if not, create it
-                if not os.path.exists(self.conversation_history_path):
-                    os.makedirs(self.conversation_history_path)
-                # Write or overwrite the file
-                with open(
-                    os.path.join(
-                        self.conversation_history_path, self.conversation_filename
-                    ),
-                    "w",
-                ) as f:
-                    json.dump(self.messages, f)
+        `terminal_interface` renders everything itself, so its yields are only
+        drained (in C) rather than passed through `_streaming_chat`.
+        """
+        collections.deque(terminal_interface(self, message), maxlen=0)
+
+    def _add_incoming_message(self, message):
+        """
+        Append a one-off message passed to `chat()` and mark where the new
+        response starts (`self.last_messages_count`).
+        """
+        if not (message or message == ""):
+            raise Exception(
+                "`interpreter.chat()` requires a display. Set `display=True` or pass a message into `interpreter.chat(message)`."
+            )
+
+        ## We support multiple formats for the incoming message:
+        # Dict (these are passed directly in)
+        if isinstance(message, dict):
+            if "role" not in message:
+                message["role"] = "user"
+            self.messages.append(message)
+        # String (we construct a user message dict)
+        elif isinstance(message, str):
+            self.messages.append(
+                {"role": "user", "type": "message", "content": message}
+            )
+        # List (this is like the OpenAI API)
+        elif isinstance(message, list):
+            self.messages = message
+
+        # Now that the user's messages have been added, we set last_messages_count.
+        # This way we will only return the messages after what they added.
+        self.last_messages_count = len(self.messages)
+
+        # DISABLED because I think we should just not transmit images to non-multimodal models?
+        # REENABLE this when multimodal becomes more common:
+
+        # Make sure we're using a model that can handle this
+        # if not self.llm.supports_vision:
+        #     for message in self.messages:
+        #         if message["type"] == "image":
+        #             raise Exception(
+        #                 "Use a multimodal model and set `interpreter.llm.supports_vision` to True to handle image messages."
+        #             )
+
+    def _save_conversation(self):
+        """Save the conversation if we've turned conversation_history on."""
+        if not self.conversation_history:
             return
 
-        raise Exception(
-            "`interpreter.chat()` requires a display. Set `display=True` or pass a message into `interpreter.chat(message)`."
-        )
+        # If it's the first message, set the conversation name
+        if not self.conversation_filename:
+            first_few_words_list = self.messages[0]["content"][:25].split(" ")
+            if (
+                len(first_few_words_list) >= 2
+            ):  # for languages like English with blank between words
+                first_few_words = "_".join(first_few_words_list[:-1])
+            else:  # for languages like Chinese without blank between words
+                first_few_words = self.messages[0]["content"][:15]
+            first_few_words = first_few_words.translate(_FN_TRANSLATE)
+
+            date = datetime.now().strftime("%B_%d_%Y_%H-%M-%S")
+            self.conversation_filename = "__".join([first_few_words, date]) + ".json"
+
+        # Create the directory once (re-checked only if the path changes)
+        if self._hist_dir_ensured != self.conversation_history_path:
+            os.makedirs(self.conversation_history_path, exist_ok=True)
+            self._hist_dir_ensured = self.conversation_history_path
+        # Write or overwrite the file, unless nothing was added since the last save
+        path = os.path.join(self.conversation_history_path, self.conversation_filename)
+        saved_state = (path, id(self.messages), len(self.messages))
+        if saved_state != self._last_saved:
+            # Serialized here so the snapshot matches this turn; only the file
+            # I/O happens on the background writer thread
+            queue_save(path, _dumps_messages(self.messages))
+            self._last_saved = saved_state
 
     def _respond_and_store(self):
         """
@@ -367,23 +438,34 @@ class OpenInterpreter:
         # Ensure we are not noisy by default during the respond/store loop.
         self.verbose = False
 
-        def is_ephemeral(chunk):
-            """Return True for chunks that should not be saved to conversation history.
+        def store(message):
+            """Append a new message, buffering its streamed text until the next flush.
 
-            Ephemeral chunks include active_line markers and review chunks.
+            Chunks are collected in a `_chunks` list and joined once by
+            `_flush_content`, instead of re-copying the whole string per token.
             """
-            if "format" in chunk and chunk["format"] == "active_line":
-                return True
-            if chunk.get("type") == "review":
-                return True
-            return False
+            nonlocal buffered_len
+            self._join_buffer()
+            if isinstance(message.get("content"), str):
+                message = {**message, "_chunks": [message["content"]], "content": ""}
+                buffered_len = len(message["_chunks"][0])
+                self._buffered_message = message
+            self.messages.append(message)
+
+        # Running length of the buffered message's `_chunks` buffer
+        buffered_len = 0
 
         last_flag_base = None
 
+        # Resolved once: neither changes while we're streaming. (self.messages is
+        # deliberately not aliased, since respond() and the UI may reassign it.)
+        stop_event = getattr(self, "stop_event", None)
+        max_output = self.max_output
+
         try:
             for chunk in respond(self):
                 # For async usage: stop if requested
-                if hasattr(self, "stop_event") and self.stop_event.is_set():
+                if stop_event is not None and stop_event.is_set():
                     print("Open Interpreter stopping.")
                     break
 
@@ -398,7 +480,7 @@ class OpenInterpreter:
                 ):
                     # If output wasn't yet produced, add an empty output message
                     if self.messages and self.messages[-1].get("role") != "computer":
-                        self.messages.append(
+                        store(
                             {
                                 "role": "computer",
                                 "type": "console",
@@ -411,6 +493,7 @@ class OpenInterpreter:
                 if chunk.get("type") == "confirmation":
                     # Emit an end flag for the last message type, and reset last_flag_base
                     if last_flag_base:
+                        self._flush_content()
                         yield {**last_flag_base, "end": True}
                         last_flag_base = None
 
@@ -418,6 +501,13 @@ class OpenInterpreter:
                         yield chunk
                     continue
 
+                # Ephemeral chunks (active_line markers and reviews) are streamed but
+                # not saved to conversation history
+                ephemeral = (
+                    chunk.get("format") == "active_line"
+                    or chunk.get("type") == "review"
+                )
+
                 # Determine whether this chunk continues the previous message
                 if (
                     last_flag_base
@@ -427,27 +517,46 @@ class OpenInterpreter:
                     and last_flag_base["type"] == chunk["type"]
                     and (
                         "format" not in last_flag_base
-                        or ("format" in chunk and chunk.get("format") == last_flag_base.get("format"))
+                        or (
+                            "format" in chunk
+                            and chunk.get("format") == last_flag_base.get("format")
+                        )
                     )
                 ):
                     # Append content to the existing message unless ephemeral
-                    if not is_ephemeral(chunk):
-                        if any(
-                            [
-                                (prop in self.messages[-1])
-                                and (self.messages[-1].get(prop) != chunk.get(prop))
-                                for prop in ["role", "type", "format"]
-                            ]
+                    if not ephemeral:
+                        last_message = self.messages[-1]
+                        # A property set on the last message but differing here starts a new one
+                        if (
+                            (
+                                "role" in last_message
+                                and last_message["role"] != chunk.get("role")
+                            )
+                            or (
+                                "type" in last_message
+                                and last_message["type"] != chunk.get("type")
+                            )
+                            or (
+                                "format" in last_message
+                                and last_message["format"] != chunk.get("format")
+                            )
                         ):
-                            self.messages.append(chunk)
+                            store(chunk)
+                        elif last_message is self._buffered_message:
+                            last_message["_chunks"].append(chunk.get("content", ""))
+                            buffered_len += len(chunk.get("content", ""))
                         else:
-                            self.messages[-1]["content"] += chunk.get("content", "")
+                            last_message["content"] += chunk.get("content", "")
                 else:
                     # New message boundary: yield end for previous and start for new
                     if last_flag_base:
+                        self._flush_content()
                         yield {**last_flag_base, "end": True}
 
-                    last_flag_base = {"role": chunk.get("role"), "type": chunk.get("type")}
+                    last_flag_base = {
+                        "role": chunk.get("role"),
+                        "type": chunk.get("type"),
+                    }
 
                     # Don't add format to type: "console" flags, to accommodate active_line AND output formats
                     if "format" in chunk and chunk.get("type") != "console":
@@ -456,45 +565,124 @@ class OpenInterpreter:
                     yield {**last_flag_base, "start": True}
 
                     # Add the chunk as a new message (unless ephemeral)
-                    if not is_ephemeral(chunk):
+                    if not ephemeral:
                         # If the incoming chunk is a code message, capture the current
                         # screen and append an image message immediately BEFORE the
                         # code message. This records the UI state the model saw.
+                        # The capture runs in the background while the code streams in;
+                        # its path is filled in by the next `_flush_content()`, i.e. when
+                        # the code message ends or before respond() reads the messages.
                         if chunk.get("type") == "code":
-                            try:
-                                screenshot_path = take_screenshot()
-                                self.messages.append(
-                                    {
-                                        "role": chunk.get("role", "assistant"),
-                                        "type": "image",
-                                        "format": "path",
-                                        "content": screenshot_path,
-                                    }
-                                )
-                            except Exception as e:
-                                if getattr(self, "debug", False):
-                                    print(
-                                        "Warning: failed to capture screenshot before code output:", e
-                                    )
-
-                        self.messages.append(chunk)
+                            self._settle_screenshot()
+                            image_message = {
+                                "role": chunk.get("role", "assistant"),
+                                "type": "image",
+                                "format": "path",
+                                "content": None,
+                            }
+                            store(image_message)
+                            self._pending_screenshot = (
+                                screenshot_pool.submit(
+                                    take_screenshot,
+                                    max_side=self.llm.vision_max_side
+                                    if self.shrink_images
+                                    else None,
+                                    # e.g. the screenshot the caller attached to its message
+                                    reuse_within=0.5,
+                                ),
+                                image_message,
+                            )
+
+                        store(chunk)
 
                 # Yield the chunk itself for the streaming UI
                 yield chunk
 
-                # Truncate console outputs to a reasonable length to avoid OOM/UI issues
+                # Truncate console outputs to a reasonable length to avoid OOM/UI issues.
+                # Buffered output is truncated for good when it's flushed; here we only
+                # compact it once it has grown well past max_output, to bound memory.
                 if chunk.get("type") == "console" and chunk.get("format") == "output":
-                    self.messages[-1]["content"] = truncate_output(
-                        self.messages[-1].get("content", ""),
-                        self.max_output,
-                        add_scrollbars=self.computer.import_computer_api,
-                    )
+                    last_message = self.messages[-1]
+                    buffered = last_message.get("_chunks")
+                    if buffered is None:
+                        if len(last_message.get("content", "")) > max_output:
+                            last_message["content"] = truncate_output(
+                                last_message["content"],
+                                max_output,
+                                add_scrollbars=self.computer.import_computer_api,
+                            )
+                    elif buffered_len > 2 * max_output:
+                        compacted = truncate_output(
+                            last_message["content"] + "".join(buffered),
+                            max_output,
+                            add_scrollbars=self.computer.import_computer_api,
+                        )
+                        last_message["_chunks"] = [compacted]
+                        last_message["content"] = ""
+                        buffered_len = len(compacted)
 
             # Yield a final end flag for the last open message
+            self._flush_content()
             if last_flag_base:
                 yield {**last_flag_base, "end": True}
         except GeneratorExit:
             raise  # propagate generator exit
+        finally:
+            # Never leave a placeholder image message behind (e.g. on stop or error)
+            self._flush_content()
+
+    def _flush_content(self):
+        """
+        Bring `self.messages` up to date: fill in (or drop) a screenshot still
+        being captured, and join the streamed `_chunks` buffer. Called at message
+        boundaries and by `respond` before it reads the conversation.
+        """
+        self._settle_screenshot()
+        self._join_buffer()
+
+    def _settle_screenshot(self):
+        """Fill in the pending screenshot's path, or drop its placeholder message on failure."""
+        if self._pending_screenshot is None:
+            return
+        future, image_message = self._pending_screenshot
+        self._pending_screenshot = None
+        try:
+            image_message["content"] = future.result(timeout=2.0)
+        except Exception as e:
+            if getattr(self, "debug", False):
+                print("Warning: failed to capture screenshot before code output:", e)
+            for i in range(len(self.messages) - 1, -1, -1):
+                if self.messages[i] is image_message:
+                    del self.messages[i]
+                    break
+
+    def _join_buffer(self):
+        """
+        Join the streamed `_chunks` buffer of the buffered message (if any) into
+        its `content`, truncating console output to `max_output`.
+
+        This tracks the message object itself rather than `self.messages[-1]`,
+        since other code (e.g. the terminal UI) may append messages after it.
+        """
+        message = self._buffered_message
+        if message is None:
+            return
+        self._buffered_message = None
+        buffered = message.pop("_chunks", None)
+        if buffered is None:
+            return
+        content = message["content"] + "".join(buffered)
+        if (
+            message.get("type") == "console"
+            and message.get("format") == "output"
+            and len(content) > self.max_output
+        ):
+            content = truncate_output(
+                content,
+                self.max_output,
+                add_scrollbars=self.computer.import_computer_api,
+            )
+        message["content"] = content
 
     def reset(self):
         """
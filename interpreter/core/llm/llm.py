@@ -17,6 +17,7 @@ import uuid
 import requests
 import tokentrim as tt
 
+from ...capture import DEFAULT_MAX_SIDE
 from .run_text_llm import run_text_llm
 
 # from .run_function_calling_llm import run_function_calling_llm
@@ -58,6 +59,7 @@ class Llm:
         self.vision_renderer = (
             self.interpreter.computer.vision.query
         )  # Will only use if supports_vision is False
+        self.vision_max_side = DEFAULT_MAX_SIDE  # Longest side (px) of screenshots sent to the model
 
         self.supports_functions = None  # Will try to auto-detect
         self.execution_instructions = "To execute code on the user's machine, write a markdown code block. Specify the language after the ```. You will receive the output. Use any programming language."  # If supports_functions is False, this will be added to the system message
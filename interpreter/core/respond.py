@@ -21,6 +21,9 @@ def respond(interpreter):
     insert_loop_message = False
 
     while True:
+        # Make sure any streamed content buffered by the interpreter is materialized
+        interpreter._flush_content()
+
         ## RENDER SYSTEM MESSAGE ##
 
         system_message = interpreter.system_message
@@ -162,6 +165,8 @@ def respond(interpreter):
                 else:
                     raise
 
+        interpreter._flush_content()
+
         ### RUN CODE (if it's there) ###
 
         if interpreter.messages[-1]["type"] == "code":
@@ -0,0 +1,83 @@
+"""
+Writes conversation history files from a single background thread, so saving
+doesn't stall the end of a chat turn.
+"""
+import atexit
+import os
+import threading
+
+_cond = threading.Condition()
+_pending = {}  # path -> bytes; a newer save of the same path replaces the older one
+_errors = {}  # path -> exception raised while writing it, reported to the next caller
+_writing = False
+_thread = None
+
+
+def queue_save(path, data):
+    """
+    Queue `data` (already-serialized bytes) to be written to `path`.
+
+    If the previous write to `path` failed, its exception is raised here
+    (after queueing the new data), so failures still reach the caller.
+    """
+    global _thread
+    with _cond:
+        _pending[path] = data
+        if _thread is None:
+            _thread = threading.Thread(
+                target=_worker, name="oi-conversation-writer", daemon=True
+            )
+            _thread.start()
+        _cond.notify_all()
+        error = _errors.pop(path, None)
+    if error is not None:
+        raise error
+
+
+def flush_saves():
+    """Block until every queued save is written, then raise the first write error, if any."""
+    with _cond:
+        while _pending or _writing:
+            _cond.wait()
+        errors = list(_errors.values())
+        _errors.clear()
+    if errors:
+        raise errors[0]
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _worker():
+    global _writing
+    while True:
+        with _cond:
+            while not _pending:
+                _cond.wait()
+            path = next(iter(_pending))
+            data = _pending.pop(path)
+            _writing = True
+        try:
+            try:
+                _write(path, data)
+            except FileNotFoundError:
+                # e.g. the history directory was deleted since it was created
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _write(path, data)
+        except Exception as e:
+            with _cond:
+                _errors[path] = e
+        finally:
+            with _cond:
+                _writing = False
+                _cond.notify_all()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_saves()
+    except Exception as e:
+        print("Warning: failed to save conversation history:", e)
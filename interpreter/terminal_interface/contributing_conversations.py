@@ -156,7 +156,7 @@ def get_all_conversations(interpreter) -> List[List]:
         if not is_conversation_path(mpath):
             continue
         full_path = os.path.join(history_path, mpath)
-        with open(full_path, "r") as cfile:
+        with open(full_path, "r", encoding="utf-8") as cfile:
             conversation = json.load(cfile)
             all_conversations.append(conversation)
     return all_conversations
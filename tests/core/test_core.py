@@ -0,0 +1,173 @@
+import threading
+from unittest import TestCase, mock
+
+from interpreter.core.core import OpenInterpreter
+from interpreter.core.utils.truncate_output import truncate_output
+
+
+def message(content):
+    return {"role": "assistant", "type": "message", "content": content}
+
+
+def output(content):
+    return {
+        "role": "computer",
+        "type": "console",
+        "format": "output",
+        "content": content,
+    }
+
+
+def image(content):
+    return {
+        "role": "computer",
+        "type": "image",
+        "format": "base64.png",
+        "content": content,
+    }
+
+
+class TestRespondAndStoreBuffering(TestCase):
+    """
+    Tests for how `_respond_and_store` buffers streamed chunks into messages
+    and joins them back into `content`.
+    """
+
+    def run_respond(self, respond, interpreter=None, on_chunk=None):
+        """
+        Drive `_respond_and_store` with a fake `respond` generator function,
+        calling `on_chunk(interpreter, chunk)` for every yielded chunk.
+        """
+        interpreter = interpreter or OpenInterpreter()
+        interpreter.messages = [{"role": "user", "type": "message", "content": "hi"}]
+        with mock.patch("interpreter.core.core.respond", respond):
+            for chunk in interpreter._respond_and_store():
+                if on_chunk:
+                    on_chunk(interpreter, chunk)
+        return interpreter
+
+    def test_chunks_are_joined_into_content(self):
+        def respond(interpreter):
+            yield message("Hello")
+            yield message(", ")
+            yield message("world")
+
+        interpreter = self.run_respond(respond)
+
+        self.assertEqual(interpreter.messages[-1], message("Hello, world"))
+        self.assertIsNone(interpreter._buffered_message)
+
+    def test_flush_content_materializes_mid_stream(self):
+        """`respond` calls `_flush_content()` before reading the conversation."""
+        seen = []
+
+        def respond(interpreter):
+            yield message("Hello")
+            yield message(" there")
+            interpreter._flush_content()
+            seen.append(dict(interpreter.messages[-1]))
+
+        self.run_respond(respond)
+
+        self.assertEqual(seen, [message("Hello there")])
+
+    def test_message_appended_after_buffered_message_is_flushed(self):
+        """
+        The terminal UI appends a console message after image output; the
+        buffered image message must still be joined.
+        """
+
+        def respond(interpreter):
+            yield image("abc")
+            yield image("def")
+            yield output("done")
+
+        def on_chunk(interpreter, chunk):
+            if chunk.get("type") == "image" and chunk.get("content") == "def":
+                interpreter.messages.append(output(""))
+
+        interpreter = self.run_respond(respond, on_chunk=on_chunk)
+
+        self.assertEqual(interpreter.messages[1], image("abcdef"))
+        for m in interpreter.messages:
+            self.assertNotIn("_chunks", m)
+
+    def test_long_output_is_compacted_and_truncated(self):
+        interpreter = OpenInterpreter(max_output=100)
+        interpreter.computer.import_computer_api = False
+        pieces = [str(i % 10) * 10 for i in range(100)]
+        buffered_lengths = []
+
+        def respond(interpreter):
+            for piece in pieces:
+                yield output(piece)
+
+        def on_chunk(interpreter, chunk):
+            if chunk.get("content") in pieces and "_chunks" in interpreter.messages[-1]:
+                buffered_lengths.append(
+                    sum(map(len, interpreter.messages[-1]["_chunks"]))
+                )
+
+        self.run_respond(respond, interpreter=interpreter, on_chunk=on_chunk)
+
+        # Memory stays bounded while streaming: the buffer is compacted once it
+        # passes 2 * max_output (plus the truncation notice)
+        notice = len(truncate_output("x" * 101, 100)) - 100
+        self.assertLessEqual(max(buffered_lengths), 2 * 100 + notice + 10)
+        # ...and the final content is the same as truncating everything at once
+        self.assertEqual(
+            interpreter.messages[-1]["content"],
+            truncate_output("".join(pieces), 100),
+        )
+
+    def test_short_output_is_not_truncated(self):
+        interpreter = OpenInterpreter(max_output=100)
+
+        def respond(interpreter):
+            yield output("a" * 40)
+            yield output("b" * 40)
+
+        self.run_respond(respond, interpreter=interpreter)
+
+        self.assertEqual(interpreter.messages[-1], output("a" * 40 + "b" * 40))
+
+    def test_pending_screenshot_is_settled_by_flush_content(self):
+        """
+        `respond` may start the next LLM call without yielding another chunk
+        (e.g. text "code" is rewritten into a message), so the screenshot
+        placeholder must be filled in by `_flush_content()`.
+        """
+        seen = []
+
+        def respond(interpreter):
+            yield {
+                "role": "assistant",
+                "type": "code",
+                "format": "text",
+                "content": "hello",
+            }
+            interpreter._flush_content()
+            seen.extend(m for m in interpreter.messages if m["type"] == "image")
+
+        with mock.patch(
+            "interpreter.core.core.take_screenshot", return_value="shot.jpeg"
+        ):
+            self.run_respond(respond)
+
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(seen[0]["content"], "shot.jpeg")
+
+
+class TestWait(TestCase):
+    def test_clearing_responding_releases_wait(self):
+        interpreter = OpenInterpreter()
+        interpreter.responding = True
+
+        # e.g. a caller that drained a `stream=True` generator itself
+        threading.Timer(0.05, setattr, (interpreter, "responding", False)).start()
+        waiter = threading.Thread(target=interpreter.wait)
+        waiter.start()
+        waiter.join(timeout=5)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertFalse(interpreter.responding)
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from interpreter.core.utils.conversation_writer import flush_saves, queue_save
+
+
+class TestConversationWriter(TestCase):
+    def test_latest_save_per_path_wins(self):
+        with tempfile.TemporaryDirectory() as d:
+            first, second = os.path.join(d, "a.json"), os.path.join(d, "b.json")
+            queue_save(first, b"[1]")
+            queue_save(second, b"[2]")
+            queue_save(first, b"[3]")
+            flush_saves()
+
+            with open(first, "rb") as f:
+                self.assertEqual(f.read(), b"[3]")
+            # A save of another conversation is never dropped
+            with open(second, "rb") as f:
+                self.assertEqual(f.read(), b"[2]")
+
+    def test_write_errors_reach_the_caller(self):
+        with tempfile.TemporaryDirectory() as d:
+            # The "directory" is a regular file, so it can't be recreated either
+            blocker = os.path.join(d, "not_a_dir")
+            open(blocker, "wb").close()
+            queue_save(os.path.join(blocker, "c.json"), b"[]")
+            with self.assertRaises(OSError):
+                flush_saves()
+
+    def test_deleted_directory_is_recreated(self):
+        with tempfile.TemporaryDirectory() as d:
+            history = os.path.join(d, "conversations")
+            os.makedirs(history)
+            path = os.path.join(history, "d.json")
+            queue_save(path, b"[1]")
+            flush_saves()
+
+            shutil.rmtree(history)
+            queue_save(path, b"[2]")
+            flush_saves()
+
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"[2]")
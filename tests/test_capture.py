@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from PIL import Image
+
+from interpreter import capture
+from interpreter.core.llm.utils.convert_to_openai_messages import (
+    convert_to_openai_messages,
+)
+
+
+class FakeScreenShot:
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.bgra = bytes(width * height * 4)
+
+
+class FakeMSS:
+    """Stands in for `mss.mss()`: a single fake monitor with a blank frame."""
+
+    def __init__(self, width=400, height=200):
+        self.monitors = [{}, {"left": 0, "top": 0, "width": width, "height": height}]
+
+    def grab(self, monitor):
+        return FakeScreenShot(monitor["width"], monitor["height"])
+
+    def close(self):
+        pass
+
+
+class TestTakeScreenshot(TestCase):
+    def setUp(self):
+        # Screenshots are written to ./screenshots, so capture in a scratch directory
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.addCleanup(os.chdir, self.cwd)
+
+        for patcher in (
+            mock.patch("mss.mss", FakeMSS),
+            mock.patch.object(capture, "_sct_local", threading.local()),
+            mock.patch.object(capture, "_dxcam", None),
+            mock.patch.object(capture, "_cam", None),
+            mock.patch.object(capture, "_last_shot", None),
+            mock.patch.object(capture, "_screenshots_dir_ensured", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_recreates_deleted_screenshots_directory(self):
+        first = capture.take_screenshot()
+        shutil.rmtree("screenshots")
+
+        second = capture.take_screenshot()
+
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.isfile(second))
+
+    def test_reuses_recent_screenshot_with_same_max_side(self):
+        first = capture.take_screenshot(max_side=100)
+
+        self.assertEqual(capture.take_screenshot(max_side=100, reuse_within=60), first)
+        self.assertNotEqual(
+            capture.take_screenshot(max_side=50, reuse_within=60), first
+        )
+
+    def test_reuse_within_zero_always_captures(self):
+        first = capture.take_screenshot(max_side=100)
+
+        self.assertNotEqual(capture.take_screenshot(max_side=100), first)
+
+    def test_jpeg_is_downscaled_to_max_side(self):
+        path = capture.take_screenshot(max_side=100)
+
+        with Image.open(path) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertEqual(img.size, (100, 50))
+
+    def test_jpeg_path_is_sent_as_image_jpeg(self):
+        path = capture.take_screenshot(max_side=100)
+        messages = [
+            {"role": "computer", "type": "image", "format": "path", "content": path}
+        ]
+
+        (converted,) = convert_to_openai_messages(messages, vision=True)
+
+        url = converted["content"][0]["image_url"]["url"]
+        self.assertTrue(url.startswith("data:image/jpeg;base64,"))
+
+    def test_no_max_side_keeps_full_resolution(self):
+        with Image.open(capture.take_screenshot(max_side=None)) as img:
+            self.assertEqual(img.size, (400, 200))
+
+    def test_back_to_back_captures_get_distinct_filenames(self):
+        first = capture.take_screenshot()
+        second = capture.take_screenshot()
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(os.path.isfile(first))
+        self.assertTrue(os.path.isfile(second))
+
+    def test_png_flag_saves_full_resolution_png(self):
+        with mock.patch.object(capture, "_SAVE_PNG", True):
+            path = capture.take_screenshot(max_side=100)
+
+        self.assertTrue(path.endswith(".png"))
+        with Image.open(path) as img:
+            self.assertEqual(img.format, "PNG")
+            self.assertEqual(img.size, (400, 200))
+
+    def test_falls_back_to_mss_when_dxcam_fails(self):
+        dxcam = mock.Mock()
+        dxcam.create.side_effect = RuntimeError("no DXGI output")
+
+        with mock.patch.object(capture, "_dxcam", dxcam):
+            path = capture.take_screenshot(max_side=None)
+            # Not retried on later captures
+            self.assertIsNone(capture._dxcam)
+
+        with Image.open(path) as img:
+            self.assertEqual(img.size, (400, 200))